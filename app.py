@@ -16,6 +16,7 @@ from src.config import (
     INITIAL_RETRIEVAL_K,
     FINAL_TOP_K
 )
+from src.retriever.generations import current_generation
 
 # Page configuration
 st.set_page_config(
@@ -91,80 +92,75 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Cache the embeddings model (loads only once)
-@st.cache_resource(show_spinner=False)
+# Process-wide model prewarm. `python serve.py` starts it before the server accepts sessions;
+# under a plain `streamlit run app.py` it starts on the first script run instead
+from src.utils.startup import get_prewarmer
+
+prewarmer = get_prewarmer()
+
+# Embeddings model (loaded once by the prewarmer)
 def get_embeddings():
     try:
-        from src.embeddings.hugging_face import get_embeddings as get_emb 
-        return get_emb(EMBEDDING_MODEL)
+        return prewarmer.get("embeddings")
     except Exception as e:
         st.error(f"Failed to load embeddings: {e}")
         raise
 
-# Cache the vector database connection (loads only once)
-@st.cache_resource(show_spinner=False)
+# Versioned vector database (hot-swaps to newly ingested generations between requests)
 def get_vector_db():
-    from langchain_chroma import Chroma
-    embeddings = get_embeddings()
-    return Chroma(
-        persist_directory=PERSIST_DIR, 
-        embedding_function=embeddings, 
-        collection_name="langchain"
-    )
+    return prewarmer.get("vector_db")
 
-# Cache the RAG chain (loads only once)
-@st.cache_resource(show_spinner=False)
+# RAG chain (built once by the prewarmer)
 def get_rag_chain():
-    from src.rag.chain import build_chain
-    api_key = os.getenv(GOOGLE_API_KEY_ENV)
-    if not api_key:
-        raise ValueError(f"{GOOGLE_API_KEY_ENV} not found in environment")
-    return build_chain(LLM_MODEL, api_key)
-
-# Conversational RAG function with chat history
-def chat_with_rag(question, chat_history):
-    """Fast conversational chat function with cached models"""
+    return prewarmer.get("chain")
+
+# Vector search + rerank for one standalone query
+def retrieve_docs(query, query_vec):
+    # Step 1: Retrieve more documents initially for reranking (query already embedded),
+    # pinning the current index generation only for the search itself
+    with get_vector_db().reader() as db:
+        initial_docs = db.similarity_search_by_vector(query_vec, k=INITIAL_RETRIEVAL_K)
+    if not initial_docs:
+        return []
+    
+    # Step 2: Rerank the documents
+    from src.embeddings.reranker import rerank_documents
+    return rerank_documents(
+        query=query,
+        documents=initial_docs,
+        top_k=FINAL_TOP_K,
+        model_name=RERANKER_MODEL
+    )
+
+# Conversational RAG function with per-session conversation state
+def chat_with_rag(question, conversation):
+    """Fast conversational chat function with cached models and retrieval reuse"""
     try:
-        # Use cached database and chain
-        db = get_vector_db()
+        # Use cached embeddings and chain
+        embeddings = get_embeddings()
         chain = get_rag_chain()
         
-        # Step 1: Retrieve more documents initially for reranking
-        initial_docs = db.similarity_search(question, k=INITIAL_RETRIEVAL_K)
-        
-        if not initial_docs:
-            return "I couldn't find relevant information in the knowledge base."
-        
-        # Step 2: Rerank the documents
-        from src.embeddings.reranker import rerank_documents
-        docs = rerank_documents(
-            query=question,
-            documents=initial_docs,
-            top_k=FINAL_TOP_K,
-            model_name=RERANKER_MODEL
-        )
+        # Condense follow-ups for retrieval and reuse the previous chunks when the topic hasn't changed
+        _, docs, _ = conversation.retrieve(question, embeddings, retrieve_docs)
         
         if not docs:
-            return "I couldn't find relevant information after reranking."
+            return "I couldn't find relevant information in the knowledge base."
         
         context = "\n\n".join([d.page_content for d in docs])
         
-        # Build conversation history for context
+        # Bounded conversation summary instead of raw history (kept apart from the
+        # document context so the extractive fallback never quotes it)
         conversation_context = ""
-        if chat_history:
-            conversation_context = "\n\nPrevious conversation:\n"
-            for msg in chat_history[-4:]:  # Last 2 exchanges (4 messages)
-                role = "User" if msg["role"] == "user" else "Assistant"
-                conversation_context += f"{role}: {msg['content']}\n"
-        
-        # Enhanced prompt with conversation history
-        full_context = f"{context}\n{conversation_context}"
+        if conversation.summary:
+            conversation_context = f"\nConversation so far:\n{conversation.summary}\n"
         
-        # Generate response
+        # Generate response (the summary gives the LLM the context the condensed query had)
         from src.rag.chain import ask
-        result = ask(chain, full_context, question)
+        result = ask(chain, context, question, history=conversation_context)
+        answer = result.content if hasattr(result, "content") else str(result)
         
-        return result.content if hasattr(result, "content") else str(result)
+        conversation.update(question, answer)
+        return answer
         
     except Exception as e:
         return f"Error: {str(e)}"
@@ -172,6 +168,9 @@ def chat_with_rag(question, chat_history):
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "conversation" not in st.session_state:
+    from src.rag.conversation import ConversationState
+    st.session_state.conversation = ConversationState()
 
 # Sidebar
 with st.sidebar:
@@ -197,8 +196,10 @@ with st.sidebar:
     st.divider()
     
     # Database status
-    if os.path.exists(PERSIST_DIR):
+    generation = current_generation(PERSIST_DIR)
+    if generation is not None:
         st.success("✅ Knowledge base ready")
+        st.caption(f"Index generation: {generation}")
         # Show number of messages in conversation
         if st.session_state.messages:
             msg_count = len(st.session_state.messages) // 2
@@ -209,8 +210,29 @@ with st.sidebar:
     
     st.divider()
     
+    # Model readiness (polls until every model is loaded; failed loads are retried)
+    @st.fragment(run_every=None if prewarmer.ready else "1s")
+    def show_readiness():
+        status = prewarmer.status()
+        failed = [name for name, state in status.items() if state == "failed"]
+        loading = [name for name, state in status.items() if state == "loading"]
+        if failed:
+            st.error(f"❌ Failed to load: {', '.join(failed)}")
+        elif loading:
+            st.info(f"⏳ Warming up: {', '.join(loading)}")
+        else:
+            st.success("✅ Models ready")
+        if prewarmer.timings:
+            with st.expander("⏱️ Startup profile"):
+                st.code(prewarmer.report(), language=None)
+    
+    show_readiness()
+    
+    st.divider()
+    
     if st.button("🗑️ Clear Chat"):
         st.session_state.messages = []
+        del st.session_state.conversation
         st.rerun()
 
 # Main chat area
@@ -231,7 +253,7 @@ if prompt := st.chat_input("Message University of Kerala Assistant..."):
     # Get assistant response
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
-            # Pass chat history for conversational context
-            result = chat_with_rag(prompt, st.session_state.messages[:-1])
+            # Pass the session's conversation state for follow-ups and memory
+            result = chat_with_rag(prompt, st.session_state.conversation)
             st.markdown(result)
             st.session_state.messages.append({"role": "assistant", "content": result})
@@ -0,0 +1,148 @@
+import time
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+from src.config import (
+    EMBEDDING_MODEL,
+    RERANKER_MODEL,
+    INFERENCE_BACKEND,
+    INFERENCE_THREADS,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    INITIAL_RETRIEVAL_K,
+    FINAL_TOP_K
+)
+from src.embeddings.backend import BACKENDS, loaded_backend, onnx_available
+from src.embeddings.hugging_face import get_embeddings
+from src.embeddings.reranker import get_reranker
+from src.ingestion.load_docs import load_documents
+from src.ingestion.split_docs import split_documents
+from src.utils.helpers import sample_queries
+
+load_dotenv()
+
+def load_corpus(data_path, max_chunks=None):
+    """Load and split the bundled corpus the same way ingest does."""
+    docs = load_documents(data_path)
+    chunks = split_documents(docs, CHUNK_SIZE, CHUNK_OVERLAP)
+    if max_chunks:
+        chunks = chunks[:max_chunks]
+    print(f"\n📁 Corpus: {len(docs)} documents, {len(chunks)} chunks")
+    return chunks
+
+def exact_top_k(query_vecs, doc_vecs, k):
+    """Brute-force cosine top-k over normalized vectors."""
+    q = query_vecs / np.linalg.norm(query_vecs, axis=1, keepdims=True)
+    d = doc_vecs / np.linalg.norm(doc_vecs, axis=1, keepdims=True)
+    sims = q @ d.T
+    return np.argsort(-sims, axis=1)[:, :k]
+
+def require_backend(model, backend, label):
+    """Stop when a fallback means the requested backend is not what actually got loaded."""
+    actual = loaded_backend(model)
+    if actual != backend:
+        print(f"   ❌ {label} requested backend '{backend}' but loaded '{actual}'")
+        raise SystemExit(1)
+
+def speedup(timings, backend):
+    """Reference ms/query divided by the candidate's, formatted like 2.31x."""
+    return f"{timings['torch'] / max(timings[backend], 1e-9):.2f}x"
+
+def check_embeddings(chunks, queries, backend, num_threads):
+    """Embed corpus and queries with both backends and retrieve each backend's own candidates."""
+    print(f"\n🧮 Embeddings ({EMBEDDING_MODEL}):")
+    texts = [c.page_content for c in chunks]
+    results = {}
+    timings = {}
+    for name in ("torch", backend):
+        emb = get_embeddings(EMBEDDING_MODEL, backend=name, num_threads=num_threads)
+        require_backend(getattr(emb, "_client", None) or getattr(emb, "client", None), name, "Embeddings")
+        start = time.perf_counter()
+        doc_vecs = np.array(emb.embed_documents(texts))
+        ingest_s = time.perf_counter() - start
+        start = time.perf_counter()
+        query_vecs = np.array([emb.embed_query(q) for q in queries])
+        query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        results[name] = (doc_vecs, query_vecs)
+        timings[name] = query_ms
+        print(f"   {name:<11} ingest {ingest_s:6.2f}s | {query_ms:6.2f} ms/query")
+    print(f"   Query speedup over torch: {speedup(timings, backend)}")
+
+    ref_docs, ref_queries = results["torch"]
+    cand_docs, cand_queries = results[backend]
+    cos = np.sum(ref_docs * cand_docs, axis=1) / (
+        np.linalg.norm(ref_docs, axis=1) * np.linalg.norm(cand_docs, axis=1))
+    print(f"   Cosine to reference: mean {cos.mean():.4f} | min {cos.min():.4f}")
+
+    ref_top = exact_top_k(ref_queries, ref_docs, INITIAL_RETRIEVAL_K)
+    cand_top = exact_top_k(cand_queries, cand_docs, INITIAL_RETRIEVAL_K)
+    overlap = np.mean([len(set(r) & set(c)) / INITIAL_RETRIEVAL_K for r, c in zip(ref_top, cand_top)])
+    print(f"   Retrieval overlap@{INITIAL_RETRIEVAL_K}: {overlap:.3f}")
+    return {"torch": ref_top, backend: cand_top}
+
+def check_pipeline(chunks, queries, candidates, backend, num_threads):
+    """
+    Rerank each backend's own candidates with its own reranker and compare the final
+    chunks end to end. Returns the number of queries whose final chunk list differs.
+    """
+    print(f"\n🏅 Reranker ({RERANKER_MODEL}):")
+    finals = {}
+    scores = {}
+    timings = {}
+    for name in ("torch", backend):
+        reranker = get_reranker(RERANKER_MODEL, backend=name, num_threads=num_threads)
+        require_backend(reranker, name, "Reranker")
+        finals[name], scores[name] = [], []
+        start = time.perf_counter()
+        for q, ids in zip(queries, candidates[name]):
+            ids = [int(i) for i in ids]
+            pair_scores = np.asarray(reranker.predict([[q, chunks[i].page_content] for i in ids]))
+            scores[name].append(dict(zip(ids, pair_scores)))
+            finals[name].append([ids[j] for j in np.argsort(-pair_scores)[:FINAL_TOP_K]])
+        query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        timings[name] = query_ms
+        print(f"   {name:<11} {query_ms:7.2f} ms/query ({INITIAL_RETRIEVAL_K} pairs)")
+    print(f"   Rerank speedup over torch: {speedup(timings, backend)}")
+
+    max_diff = 0.0
+    for ref, cand in zip(scores["torch"], scores[backend]):
+        common = ref.keys() & cand.keys()
+        if common:
+            max_diff = max(max_diff, max(abs(float(ref[i] - cand[i])) for i in common))
+    changed = sum(set(r) != set(c) for r, c in zip(finals["torch"], finals[backend]))
+    reordered = sum(r != c for r, c in zip(finals["torch"], finals[backend])) - changed
+    print(f"   Max score difference: {max_diff:.4f}")
+    print(f"\n🔍 End-to-end (own embeddings → own reranker):")
+    print(f"   Queries with different final chunks: {changed}/{len(queries)}")
+    print(f"   Queries with the same chunks in a different order: {reordered}/{len(queries)}")
+    return changed + reordered
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity check of an inference backend against torch")
+    parser.add_argument("--backend", default=INFERENCE_BACKEND, choices=BACKENDS)
+    parser.add_argument("--threads", type=int, default=INFERENCE_THREADS)
+    parser.add_argument("--path", default="./data")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--max-chunks", type=int, default=None)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"📊 BACKEND PARITY CHECK: torch vs {args.backend}")
+    print("=" * 60)
+
+    if args.backend == "onnx" and not onnx_available():
+        print("\n❌ optimum[onnxruntime] is not installed, the onnx backend would silently run on torch")
+        raise SystemExit(1)
+
+    chunks = load_corpus(args.path, args.max_chunks)
+    queries = sample_queries(chunks, args.queries)
+    candidates = check_embeddings(chunks, queries, args.backend, args.threads)
+    mismatches = check_pipeline(chunks, queries, candidates, args.backend, args.threads)
+
+    print("\n" + "=" * 60)
+    if mismatches:
+        print("❌ Backend changes the final chunks (or their order) for some queries")
+        print("=" * 60)
+        raise SystemExit(1)
+    print("✅ Parity check passed!")
+    print("=" * 60)
@@ -1,9 +1,11 @@
 import os
+import atexit
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_community.vectorstores import Chroma
 from src.embeddings.hugging_face import get_embeddings
 from src.config import PERSIST_DIR, EMBEDDING_MODEL
+from src.retriever.generations import lease_current, drop_lease
 
 load_dotenv()
 
@@ -26,16 +28,20 @@ def check_source_files(data_path="./data"):
 
 def check_chroma_db():
     """Check ChromaDB collection and stored documents."""
-    if not os.path.exists(PERSIST_DIR):
-        print(f"\n❌ ChromaDB directory not found: {PERSIST_DIR}")
+    # Lease the published generation for the rest of the check so an ingest can't collect it
+    generation, db_path = lease_current(PERSIST_DIR)
+    if generation is None:
+        print(f"\n❌ No ChromaDB index published in: {PERSIST_DIR}")
         print("   Run: python main.py ingest --path ./data")
         return None
+    atexit.register(drop_lease, PERSIST_DIR, generation)
     
     print(f"\n💾 ChromaDB Status:")
+    print(f"   Generation: {generation}")
     try:
         embeddings = get_embeddings(EMBEDDING_MODEL)
         db = Chroma(
-            persist_directory=PERSIST_DIR, 
+            persist_directory=db_path, 
             embedding_function=embeddings, 
             collection_name="langchain"
         )
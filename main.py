@@ -13,26 +13,36 @@ from src.config import (
     TOP_K,
     RERANKER_MODEL,
     INITIAL_RETRIEVAL_K,
-    FINAL_TOP_K
+    FINAL_TOP_K,
+    ANN_CONFIG_FILE
 )
 
-from src.ingestion.load_docs import load_documents
-from src.ingestion.split_docs import split_documents
-from src.ingestion.store_chroma import store_to_chroma
-
-from src.embeddings.hugging_face import get_embeddings
 from src.utils.helpers import ensure_dir
 
-# NOTE: do NOT import build_chain or langchain-related modules at top-level.
-# They will be imported lazily inside chat() to avoid import-time failures during ingest.
+# NOTE: do NOT import build_chain, the ingestion stack or other langchain-related modules at top-level.
+# They are imported lazily inside each command so `ask` doesn't pay for ingest imports (and vice versa).
 
-def ingest(data_path):
-    """Ingest documents from the specified path into ChromaDB."""
+def ingest(data_path, append=False):
+    """
+    Build a new index generation from the documents in data_path and publish it.
+    The running app switches to it between requests. By default the generation holds
+    exactly data_path, so edited and deleted files are reflected; with append=True it
+    starts from a copy of the current one and the documents are upserted into it.
+    """
     ensure_dir(PERSIST_DIR)
 
     import logging
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
+
+    from src.ingestion.load_docs import load_documents
+    from src.ingestion.split_docs import split_documents
+    from src.ingestion.store_chroma import store_to_chroma, hnsw_settings_changed, copy_collection, set_search_ef
+    from src.embeddings.hugging_face import get_embeddings
+    from src.retriever.generations import (
+        ingest_lock, new_generation, publish, drop_lease, collect_garbage, current_path
+    )
+
     logger.info(f"Loading documents from: {data_path}")
 
     docs = load_documents(data_path)
@@ -45,9 +55,80 @@ def ingest(data_path):
     logger.info(f"✅ Split into {len(chunks)} chunks")
     
     embeddings = get_embeddings(EMBEDDING_MODEL)
-    store_to_chroma(chunks, PERSIST_DIR, embeddings)
+    # One ingest at a time, so an appending ingest always builds on the latest published generation
+    with ingest_lock(PERSIST_DIR):
+        # A store built with other HNSW construction settings (e.g. before `tune`) is rebuilt, not copied
+        current = current_path(PERSIST_DIR)
+        rebuild = append and current is not None and hnsw_settings_changed(current)
+        generation, generation_dir = new_generation(PERSIST_DIR, copy_current=append and not rebuild)
+        try:
+            if rebuild:
+                logger.info("HNSW settings differ from the current index, rebuilding it with the configured ones")
+                copy_collection(current, generation_dir)
+            chroma = store_to_chroma(chunks, generation_dir, embeddings)
+            # Published generations are read-only, so a tuned search_ef is applied here, once
+            set_search_ef(chroma._collection)
+            publish(PERSIST_DIR, generation)
+        except BaseException:
+            import shutil
+            shutil.rmtree(generation_dir, ignore_errors=True)
+            raise
+        finally:
+            # Once published the generation is protected as CURRENT
+            drop_lease(PERSIST_DIR, generation)
+    collect_garbage(PERSIST_DIR)
 
-    logger.info(f"✅ Successfully ingested {len(docs)} documents into ChromaDB!")
+    logger.info(f"✅ Successfully ingested {len(docs)} documents into ChromaDB generation {generation}!")
+
+
+def tune(data_path, target_recall=0.95, num_queries=50, reference_k=15):
+    """Sweep HNSW and candidate-depth settings against exact search and save the cheapest that meets target_recall."""
+    import logging
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+
+    import numpy as np
+    from src.ingestion.load_docs import load_documents
+    from src.ingestion.split_docs import split_documents
+    from src.embeddings.hugging_face import get_embeddings
+    from src.embeddings.reranker import get_reranker
+    from src.retriever.tuning import RerankScorer, sweep, pick_config, write_config
+    from src.utils.helpers import sample_queries
+
+    docs = load_documents(data_path)
+    if not docs:
+        logger.error("❌ No documents found to tune on.")
+        return
+    chunks = split_documents(docs, CHUNK_SIZE, CHUNK_OVERLAP)
+    queries = sample_queries(chunks, num_queries)
+    logger.info(f"Tuning on {len(chunks)} chunks with {len(queries)} sampled queries")
+
+    embeddings = get_embeddings(EMBEDDING_MODEL)
+    texts = [c.page_content for c in chunks]
+    doc_vecs = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+    query_vecs = np.array([embeddings.embed_query(q) for q in queries], dtype=np.float32)
+
+    scorer = RerankScorer(get_reranker(RERANKER_MODEL), queries, texts)
+    rows = sweep(doc_vecs, query_vecs, scorer, reference_k, FINAL_TOP_K)
+    config = write_config(pick_config(rows, target_recall), ANN_CONFIG_FILE, target_recall)
+
+    logger.info(f"✅ Wrote {ANN_CONFIG_FILE}: {config}")
+    logger.info("Run ingest to publish an index built with these settings.")
+
+
+def profile():
+    """Load and warm every model, then print the per-module import and model-load time breakdown."""
+    import logging
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+
+    from src.utils.startup import Prewarmer
+
+    prewarmer = Prewarmer()
+    prewarmer.run()
+    for name, error in prewarmer.errors.items():
+        logger.error(f"❌ {name} failed to load: {error}")
+    print(prewarmer.report())
 
 
 def chat(question, context=None, context_file=None):
@@ -60,6 +141,7 @@ def chat(question, context=None, context_file=None):
     from langchain_community.vectorstores import Chroma
     from src.embeddings.hugging_face import get_embeddings
     from src.embeddings.reranker import rerank_documents  # Import reranker
+    from src.retriever.generations import reading_current
 
     # 1. Resolve Retrieval/Context
     if context_file:
@@ -75,19 +157,23 @@ def chat(question, context=None, context_file=None):
         logger.info("Retrieving context from vector store...")
         try:
             embeddings = get_embeddings(EMBEDDING_MODEL)
-            # Explicitly match the collection name used in ingest (defaults to "langchain")
-            db = Chroma(persist_directory=PERSIST_DIR, embedding_function=embeddings, collection_name="langchain")
-            
-            # DEBUG: Check if collection has documents
-            try:
-                count = db._collection.count()
-                logger.info(f"DEBUG: ChromaDB collection has {count} documents")
-            except Exception as e:
-                logger.error(f"DEBUG: Could not get collection count: {e}")
-
-            # Step 1: Retrieve more documents initially for reranking
-            logger.info(f"Retrieving top {INITIAL_RETRIEVAL_K} documents for reranking...")
-            initial_docs = db.similarity_search(question, k=INITIAL_RETRIEVAL_K)
+            # Lease the published generation so a concurrent ingest can't collect it mid-query
+            with reading_current(PERSIST_DIR) as db_path:
+                if db_path is None:
+                    raise FileNotFoundError(f"No index published in {PERSIST_DIR}, run: python main.py ingest --path ./data")
+                # Explicitly match the collection name used in ingest (defaults to "langchain")
+                db = Chroma(persist_directory=db_path, embedding_function=embeddings, collection_name="langchain")
+
+                # DEBUG: Check if collection has documents
+                try:
+                    count = db._collection.count()
+                    logger.info(f"DEBUG: ChromaDB collection has {count} documents")
+                except Exception as e:
+                    logger.error(f"DEBUG: Could not get collection count: {e}")
+
+                # Step 1: Retrieve more documents initially for reranking
+                logger.info(f"Retrieving top {INITIAL_RETRIEVAL_K} documents for reranking...")
+                initial_docs = db.similarity_search(question, k=INITIAL_RETRIEVAL_K)
             
             if initial_docs:
                 logger.info(f"Retrieved {len(initial_docs)} documents, now reranking...")
@@ -143,15 +229,29 @@ if __name__ == "__main__":
 
     p_ingest = sub.add_parser("ingest")
     p_ingest.add_argument("--path", required=True)
+    p_ingest.add_argument("--append", action="store_true",
+                          help="Add to the current index instead of rebuilding it (chunks already indexed are overwritten, not duplicated)")
 
     p_ask = sub.add_parser("ask")
     p_ask.add_argument("--q", required=True, help="Question to ask")
     p_ask.add_argument("--context", required=False, help="Context text to pass to the LLM")
     p_ask.add_argument("--context-file", required=False, help="Path to a text file containing context")
 
+    p_tune = sub.add_parser("tune")
+    p_tune.add_argument("--path", required=True)
+    p_tune.add_argument("--target-recall", type=float, default=0.95)
+    p_tune.add_argument("--queries", type=int, default=50, help="Number of queries sampled from the corpus")
+    p_tune.add_argument("--reference-k", type=int, default=15, help="Exact candidate depth of the reference pipeline")
+
+    sub.add_parser("profile", help="Report import and model-load times")
+
     args = parser.parse_args()
 
     if args.cmd == "ingest":
-        ingest(args.path)
+        ingest(args.path, append=args.append)
     elif args.cmd == "ask":
         chat(args.q, context=args.context, context_file=args.context_file)
+    elif args.cmd == "tune":
+        tune(args.path, args.target_recall, args.queries, args.reference_k)
+    elif args.cmd == "profile":
+        profile()
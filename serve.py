@@ -0,0 +1,18 @@
+import sys
+from dotenv import load_dotenv
+load_dotenv()  # Load environment variables before the prewarm reads the API key
+
+from src.config import READINESS_PORT
+from src.utils.startup import get_prewarmer, serve_readiness
+
+# Launch the Streamlit app with every model warming from process start, so a replica is
+# ready before its first session. Extra arguments are passed on, e.g.:
+#   python serve.py --server.port 8501
+
+if __name__ == "__main__":
+    get_prewarmer()
+    serve_readiness(READINESS_PORT)
+
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", "app.py", *sys.argv[1:]]
+    sys.exit(stcli.main())
@@ -1,5 +1,9 @@
+import json
+import os
+
 # Storage
-PERSIST_DIR = "chroma_db"
+PERSIST_DIR = "chroma_db"  # Root of the versioned index generations
+INDEX_CHECK_INTERVAL_S = 2.0  # How often the app looks for a newly published generation
 
 # Models
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
@@ -20,6 +24,47 @@ RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 INITIAL_RETRIEVAL_K = 15  # Retrieve more documents initially
 FINAL_TOP_K = 5  # Keep top 5 after reranking
 
+# ANN index (HNSW). Chroma defaults; `python main.py tune` writes tuned values to ANN_CONFIG_FILE
+HNSW_M = 16
+HNSW_CONSTRUCTION_EF = 100
+HNSW_SEARCH_EF = 100
+ANN_CONFIG_FILE = "ann_config.json"
+
+if os.path.exists(ANN_CONFIG_FILE):
+    with open(ANN_CONFIG_FILE, "r", encoding="utf-8") as _f:
+        _tuned = json.load(_f)
+    HNSW_M = _tuned.get("hnsw_m", HNSW_M)
+    HNSW_CONSTRUCTION_EF = _tuned.get("hnsw_construction_ef", HNSW_CONSTRUCTION_EF)
+    HNSW_SEARCH_EF = _tuned.get("hnsw_search_ef", HNSW_SEARCH_EF)
+    INITIAL_RETRIEVAL_K = _tuned.get("initial_retrieval_k", INITIAL_RETRIEVAL_K)
+
+# Generation latency SLO (ask())
+GENERATION_BUDGET_S = 20.0  # Per-request latency budget; None disables the SLO mode
+GENERATION_MAX_IN_FLIGHT = 4  # Bound on concurrent LLM requests per process
+GENERATION_HEDGE = True  # Send a second request when the first is slower than usual
+GENERATION_HEDGE_PERCENTILE = 95  # Hedge after this percentile of recent latencies
+GENERATION_HEDGE_MIN_SAMPLES = 20  # Latencies needed before hedging kicks in
+LLM_TIMEOUT_S = 20  # Timeout of each individual Gemini call (capped so a call never outlives the budget)
+LLM_MAX_RETRIES = 0  # Client-side retries per call; hedging in ask() already retries within the budget
+FALLBACK_SENTENCES = 5  # Sentences in the extractive fallback answer
+
+# Conversation memory (app.py)
+SUMMARY_MAX_CHARS = 1200  # Bound on the rolling conversation summary sent to the LLM
+SUMMARY_ANSWER_CHARS = 200  # Per-turn answer excerpt kept in the summary
+FOLLOWUP_MAX_WORDS = 8  # Short anaphoric questions are treated as follow-ups
+REUSE_SIMILARITY = 0.85  # Reuse previous chunks when the condensed query is this close to the last one
+
+# Startup (serve.py)
+READINESS_PORT = 8502  # GET /ready answers 200 once every model is loaded
+
+# CPU inference backend for the embedder and reranker
+# "torch"      - stock PyTorch (reference)
+# "torch-int8" - PyTorch with dynamic int8 quantization of Linear layers
+# "onnx"       - ONNX Runtime graph-optimized model (needs optimum[onnxruntime])
+INFERENCE_BACKEND = "torch"
+INFERENCE_THREADS = None  # intra-op threads for torch / onnxruntime; None keeps the runtime default
+ONNX_FILE_NAME = None  # e.g. "onnx/model_qint8_avx2.onnx" for a pre-quantized export
+
 # config.py
 INFO_DIR = "data/info"
 PG_DIR = "data/pg"
@@ -0,0 +1,95 @@
+# src/embeddings/backend.py
+import importlib.util
+import logging
+
+from src.config import INFERENCE_BACKEND, INFERENCE_THREADS, ONNX_FILE_NAME
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def onnx_available():
+    """Whether the optional optimum[onnxruntime] dependency is installed."""
+    return importlib.util.find_spec("optimum") is not None and importlib.util.find_spec("onnxruntime") is not None
+
+
+def set_threads(num_threads=INFERENCE_THREADS):
+    """Pin the PyTorch intra-op thread pool (no-op when num_threads is falsy)."""
+    if not num_threads:
+        return
+    import torch
+    if torch.get_num_threads() != num_threads:
+        torch.set_num_threads(num_threads)
+
+
+def model_kwargs(backend=INFERENCE_BACKEND, num_threads=INFERENCE_THREADS, file_name=ONNX_FILE_NAME):
+    """
+    Build the constructor kwargs for SentenceTransformer / CrossEncoder.
+
+    Args:
+        backend: One of BACKENDS
+        num_threads: Intra-op thread count for the selected runtime (None keeps its default)
+        file_name: Optional ONNX file inside the model repo (e.g. a pre-quantized export)
+
+    Returns:
+        Dict of keyword arguments (empty for the PyTorch backends)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+    set_threads(num_threads)
+    if backend != "onnx":
+        return {}
+
+    if not onnx_available():
+        # Fallback so a missing optional dependency never breaks ingest or chat
+        logger.warning("optimum[onnxruntime] not installed, falling back to the torch backend")
+        return {}
+
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+
+    onnx_kwargs = {"provider": "CPUExecutionProvider", "session_options": options}
+    if file_name:
+        onnx_kwargs["file_name"] = file_name
+    return {"backend": "onnx", "model_kwargs": onnx_kwargs}
+
+
+def quantize(model, backend=INFERENCE_BACKEND):
+    """
+    Apply dynamic int8 quantization to the Linear layers of a loaded model.
+
+    Only acts for the "torch-int8" backend; the model is modified in place and returned.
+    """
+    if backend != "torch-int8" or model is None:
+        return model
+
+    import torch
+    # CrossEncoder is only an nn.Module on sentence-transformers >= 4, older versions wrap .model
+    module = model if isinstance(model, torch.nn.Module) else getattr(model, "model", None)
+    if module is None:
+        logger.warning(f"Cannot quantize {type(model).__name__}, leaving it in float32")
+        return model
+
+    torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    logger.info(f"Applied dynamic int8 quantization to {type(model).__name__}")
+    return model
+
+
+def loaded_backend(model):
+    """Backend a loaded SentenceTransformer / CrossEncoder actually runs on (fallbacks included)."""
+    if getattr(model, "backend", None) == "onnx":
+        return "onnx"
+
+    import torch
+    module = model if isinstance(model, torch.nn.Module) else getattr(model, "model", None)
+    if module is not None and any(
+        isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in module.modules()
+    ):
+        return "torch-int8"
+    return "torch"
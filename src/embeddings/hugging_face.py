@@ -1,11 +1,20 @@
 # src/embeddings/hugging_face.py
+from src.config import INFERENCE_BACKEND, INFERENCE_THREADS
+from src.embeddings.backend import model_kwargs, quantize
 
-def get_embeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"):
+
+def get_embeddings(model_name="sentence-transformers/all-MiniLM-L6-v2", backend=INFERENCE_BACKEND,
+                   num_threads=INFERENCE_THREADS):
+    kwargs = model_kwargs(backend, num_threads)
     try:
         from langchain_huggingface import HuggingFaceEmbeddings
-        return HuggingFaceEmbeddings(model_name=model_name)
+        embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=kwargs)
+        quantize(getattr(embeddings, "_client", None), backend)
+        return embeddings
     except ImportError:
         # Fallback for older environments
         print("Warning: langchain_huggingface not found, using legacy langchain.embeddings")
         from langchain.embeddings import HuggingFaceEmbeddings
-        return HuggingFaceEmbeddings(model_name=model_name)
+        embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=kwargs)
+        quantize(getattr(embeddings, "client", None), backend)
+        return embeddings
@@ -1,30 +1,41 @@
 # src/embeddings/reranker.py
 from sentence_transformers import CrossEncoder
 import logging
+import threading
+
+from src.config import INFERENCE_BACKEND, INFERENCE_THREADS
+from src.embeddings.backend import model_kwargs, quantize
 
 logger = logging.getLogger(__name__)
 
-# Global cache for the reranker model
-_reranker_model = None
+# Global cache for the reranker models, keyed by (model_name, backend)
+_reranker_models = {}
+# Guards the cache so a background prewarm and a first query never load the model twice
+_reranker_lock = threading.Lock()
 
-def get_reranker(model_name="cross-encoder/ms-marco-MiniLM-L-6-v2"):
+def get_reranker(model_name="cross-encoder/ms-marco-MiniLM-L-6-v2", backend=INFERENCE_BACKEND,
+                 num_threads=INFERENCE_THREADS):
     """
     Load and cache the cross-encoder reranker model.
     
     Args:
         model_name: Name of the cross-encoder model to use
+        backend: Inference backend, one of src.embeddings.backend.BACKENDS
+        num_threads: Intra-op thread count for the selected runtime
         
     Returns:
         CrossEncoder model instance
     """
-    global _reranker_model
+    key = (model_name, backend)
     
-    if _reranker_model is None:
-        logger.info(f"Loading reranker model: {model_name}")
-        _reranker_model = CrossEncoder(model_name)
-        logger.info("Reranker model loaded successfully")
+    with _reranker_lock:
+        if key not in _reranker_models:
+            logger.info(f"Loading reranker model: {model_name} (backend={backend})")
+            model = CrossEncoder(model_name, **model_kwargs(backend, num_threads))
+            _reranker_models[key] = quantize(model, backend)
+            logger.info("Reranker model loaded successfully")
     
-    return _reranker_model
+    return _reranker_models[key]
 
 
 def rerank_documents(query, documents, top_k=5, model_name="cross-encoder/ms-marco-MiniLM-L-6-v2"):
@@ -1,10 +1,94 @@
+import hashlib
+import logging
 import os
 from langchain_chroma import Chroma
+from src.config import HNSW_M, HNSW_CONSTRUCTION_EF, HNSW_SEARCH_EF
 
-def store_to_chroma(chunks, persist_directory, embedding_model, collection_name=None):
+logger = logging.getLogger(__name__)
+
+
+def hnsw_metadata(m=HNSW_M, construction_ef=HNSW_CONSTRUCTION_EF, search_ef=HNSW_SEARCH_EF):
+    """Collection metadata carrying the HNSW index parameters (only applied when a collection is created)."""
+    return {
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+
+
+# Chroma's own defaults, assumed for collections created without HNSW metadata
+CHROMA_DEFAULT_M = 16
+CHROMA_DEFAULT_CONSTRUCTION_EF = 100
+
+
+def set_search_ef(collection, search_ef=HNSW_SEARCH_EF, strict=False):
+    """
+    Apply the query-time ef to an existing chromadb collection.
+    This writes to the collection, so only call it on a store nobody else reads yet
+    (a generation before it is published, or a tuning collection).
+    With strict=False a failure only warns.
+    """
+    try:
+        collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    except TypeError:
+        # chromadb < 1.0 has no configuration argument, the metadata key is read at query time
+        collection.modify(metadata={**(collection.metadata or {}), "hnsw:search_ef": search_ef})
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning(f"Could not set hnsw search_ef={search_ef}: {e}")
+
+
+def hnsw_settings_changed(persist_directory, collection_name="langchain", m=HNSW_M,
+                          construction_ef=HNSW_CONSTRUCTION_EF):
+    """Whether the stored collection was built with different HNSW construction settings."""
+    import chromadb
+    client = chromadb.PersistentClient(path=persist_directory)
+    try:
+        metadata = client.get_collection(collection_name).metadata or {}
+    except Exception:
+        return False
+    return (
+        metadata.get("hnsw:M", CHROMA_DEFAULT_M) != m
+        or metadata.get("hnsw:construction_ef", CHROMA_DEFAULT_CONSTRUCTION_EF) != construction_ef
+    )
+
+
+def copy_collection(source_directory, target_directory, collection_name="langchain",
+                    collection_metadata=None, batch_size=1000):
+    """
+    Copy every record (with its stored embedding) into a new collection, rebuilding the
+    HNSW graph with collection_metadata instead of the settings it was created with.
+    """
+    import chromadb
+    source = chromadb.PersistentClient(path=source_directory).get_collection(collection_name)
+    target = chromadb.PersistentClient(path=target_directory).get_or_create_collection(
+        collection_name, metadata=collection_metadata or hnsw_metadata()
+    )
+    total = source.count()
+    for offset in range(0, total, batch_size):
+        batch = source.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        target.add(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"]
+        )
+    logger.info(f"Rebuilt {total} records from {source_directory} with {collection_metadata or hnsw_metadata()}")
+    return total
+
+
+def chunk_id(chunk):
+    """Deterministic id of a chunk (hash of source, page and text), so re-ingesting it overwrites it."""
+    key = f"{chunk.metadata.get('source', '')}|{chunk.metadata.get('page', '')}|{chunk.page_content}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def store_to_chroma(chunks, persist_directory, embedding_model, collection_name=None, collection_metadata=None):
     """
     Initialize (or load) a Chroma vector store and persist the given chunks.
     Minimal, no typing or path logic — expects strings/objects passed in from caller.
+    HNSW parameters default to the (possibly tuned) values in src.config.
     """
     print(f"DEBUG: store_to_chroma called with collection_name={collection_name}")
     
@@ -12,16 +96,21 @@ def store_to_chroma(chunks, persist_directory, embedding_model, collection_name=
     # ChromaDB requires a string name, cannot be None.
     if collection_name is None:
         collection_name = "langchain"
+    if collection_metadata is None:
+        collection_metadata = hnsw_metadata()
         
     chroma = Chroma(
         embedding_function=embedding_model,
         persist_directory=persist_directory,
-        collection_name=collection_name
+        collection_name=collection_name,
+        collection_metadata=collection_metadata
     )
 
-    chunk_list = list(chunks)
+    # Keyed by chunk_id: identical chunks are stored once and upserted over earlier copies
+    by_id = {chunk_id(c): c for c in chunks}
+    chunk_list = list(by_id.values())
     if chunk_list:
-        chroma.add_documents(chunk_list)
+        chroma.add_documents(chunk_list, ids=list(by_id))
         # chroma.persist() # New Chroma automatically persists, but we can verify
         
     print(f"DEBUG: Successfully stored {len(chunk_list)} chunks to {persist_directory}")
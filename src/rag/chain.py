@@ -1,8 +1,13 @@
 # src/rag/chain.py
+from functools import lru_cache
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.runnables import RunnablePassthrough
 
+from src.config import GENERATION_BUDGET_S, LLM_TIMEOUT_S, LLM_MAX_RETRIES
+from src.rag.slo import generate_within_budget
+
 PROMPT = """You are an intelligent assistant for a university information system. Your role is to provide accurate, helpful, and well-structured answers based on the provided context.
 
 **Instructions:**
@@ -23,13 +28,22 @@ PROMPT = """You are an intelligent assistant for a university information system
 **Answer:**"""
 
 
-def build_chain(llm_model, google_api_key=None, temperature=0.3):
+# Cached so repeated calls reuse the same client (and its open connection)
+@lru_cache(maxsize=8)
+def build_chain(llm_model, google_api_key=None, temperature=0.3, timeout=LLM_TIMEOUT_S,
+                max_retries=LLM_MAX_RETRIES):
     prompt = ChatPromptTemplate.from_template(PROMPT)
 
+    if GENERATION_BUDGET_S is not None:
+        # A call (with its client-side retries) must not hold an in-flight slot past the budget
+        timeout = min(timeout, GENERATION_BUDGET_S / (max_retries + 1))
+
     llm = ChatGoogleGenerativeAI(
         model=llm_model,
         google_api_key=google_api_key,
-        temperature=temperature
+        temperature=temperature,
+        timeout=timeout,
+        max_retries=max_retries
     )
 
     chain = (
@@ -42,5 +56,17 @@ def build_chain(llm_model, google_api_key=None, temperature=0.3):
     )
     return chain
 
-def ask(chain, context, question):
-    return chain.invoke({"context": context, "question": question})
+def ask(chain, context, question, budget_s=GENERATION_BUDGET_S, history=None):
+    """
+    Answer the question from the context within budget_s seconds.
+
+    Works with any runnable chain. history (e.g. a conversation summary) is shown to the
+    LLM after the context but is never quoted by the extractive answer returned when the
+    budget runs out or the LLM is unavailable; other errors are raised. budget_s=None waits
+    for the chain without a limit.
+    """
+    llm_context = f"{context}\n{history}" if history else context
+    inputs = {"context": llm_context, "question": question}
+    if budget_s is None:
+        return chain.invoke(inputs)
+    return generate_within_budget(chain, inputs, context, question, budget_s)
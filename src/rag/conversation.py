@@ -0,0 +1,103 @@
+# src/rag/conversation.py
+import logging
+import re
+
+import numpy as np
+
+from src.config import SUMMARY_MAX_CHARS, SUMMARY_ANSWER_CHARS, FOLLOWUP_MAX_WORDS, REUSE_SIMILARITY
+from src.utils.helpers import content_terms
+
+logger = logging.getLogger(__name__)
+
+FOLLOWUP_PREFIXES = ("and ", "what about", "how about", "also ", "what else", "same for")
+# Pronouns that point back at an earlier subject; "this" and "there" are left out because
+# they mostly open new questions ("Is there a hostel?", "What is this university's address?")
+ANAPHORA = {"that", "it", "those", "these", "they", "them", "its", "their"}
+
+
+class ConversationState:
+    """
+    Per-session conversation state: topic tracking, retrieval reuse and a bounded summary.
+
+    Follow-ups are condensed into a standalone query by attaching the current topic; the
+    condensed query is only used for retrieval, the LLM gets the user's own question.
+    The previous turn's reranked chunks are reused only when the condensed query adds no
+    content terms to the last retrieval and stays close to it; a follow-up asking for a
+    new attribute ("and the fees for that?") always retrieves afresh. The raw history is
+    replaced by a rolling summary capped at max_summary_chars.
+    """
+
+    def __init__(self, max_summary_chars=SUMMARY_MAX_CHARS, answer_chars=SUMMARY_ANSWER_CHARS,
+                 reuse_similarity=REUSE_SIMILARITY):
+        self.max_summary_chars = max_summary_chars
+        self.answer_chars = answer_chars
+        self.reuse_similarity = reuse_similarity
+        self.topic = None
+        self.last_vec = None
+        self.last_terms = set()
+        self.last_docs = []
+        self.summary_lines = []
+
+    def is_followup(self, question):
+        if self.topic is None:
+            return False
+        text = question.strip().lower()
+        words = re.findall(r"[a-z']+", text)
+        if len(words) > FOLLOWUP_MAX_WORDS:
+            return False
+        return text.startswith(FOLLOWUP_PREFIXES) or bool(ANAPHORA.intersection(words))
+
+    def condense(self, question):
+        """Turn a follow-up into a standalone query; other questions pass through unchanged."""
+        if self.is_followup(question):
+            return f"{question.strip().rstrip('?')} (regarding: {self.topic})"
+        return question
+
+    def retrieve(self, question, embeddings, search):
+        """
+        Resolve the chunks for a turn, reusing the previous ones when the topic hasn't changed.
+
+        Args:
+            question: The user's message
+            embeddings: Embeddings object used to embed the standalone query
+            search: Callable (query, query_vec) -> reranked documents
+
+        Returns:
+            Tuple of (standalone query, documents, reused flag)
+        """
+        followup = self.is_followup(question)
+        standalone = self.condense(question)
+        vec = np.asarray(embeddings.embed_query(standalone))
+
+        if self.last_docs and self.last_vec is not None and content_terms(standalone) <= self.last_terms:
+            similarity = float(vec @ self.last_vec / (np.linalg.norm(vec) * np.linalg.norm(self.last_vec)))
+            if similarity >= self.reuse_similarity:
+                logger.info(f"Reusing {len(self.last_docs)} chunks from the previous turn (similarity {similarity:.3f})")
+                return standalone, self.last_docs, True
+
+        docs = search(standalone, vec.tolist())
+        if not followup:
+            self.topic = question.strip()
+        self.last_vec = vec
+        self.last_terms = content_terms(standalone)
+        self.last_docs = docs
+        return standalone, docs, False
+
+    def update(self, question, answer):
+        """Fold the finished turn into the summary, dropping the oldest turns past the bound."""
+        line = f"User asked: {_clip(question, self.answer_chars)} | Assistant answered: {_clip(answer, self.answer_chars)}"
+        self.summary_lines.append(_clip(line, self.max_summary_chars))
+        while len(self.summary) > self.max_summary_chars:
+            self.summary_lines.pop(0)
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+
+def _clip(text, limit):
+    """Collapse whitespace and cut text to at most limit characters on a word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    return text[:max(limit - 3, 0)].rsplit(" ", 1)[0] + "..."
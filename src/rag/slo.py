@@ -0,0 +1,191 @@
+# src/rag/slo.py
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from src.config import (
+    GENERATION_MAX_IN_FLIGHT,
+    GENERATION_HEDGE,
+    GENERATION_HEDGE_PERCENTILE,
+    GENERATION_HEDGE_MIN_SAMPLES,
+    FALLBACK_SENTENCES
+)
+from src.utils.helpers import content_terms
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_NOTICE = (
+    "⚠️ A full answer couldn't be generated in time, "
+    "so here are the most relevant passages from the documents:"
+)
+UNAVAILABLE_NOTICE = (
+    "⚠️ The language model is temporarily unavailable, "
+    "so here are the most relevant passages from the documents:"
+)
+
+# HTTP statuses worth retrying: request timeout, rate limit and server-side errors
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class BudgetExceeded(Exception):
+    """Raised when no LLM response arrived within the latency budget."""
+
+
+def is_transient(error):
+    """
+    Whether a failed LLM call may succeed if retried: timeouts, connection errors and
+    429 / 5xx responses, also when wrapped by the client. Anything else (invalid API key,
+    unknown model, permission denied) is a misconfiguration and is not retried.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (BudgetExceeded, TimeoutError, ConnectionError)):
+            return True
+        if any("Timeout" in cls.__name__ for cls in type(error).__mro__):
+            return True  # httpx / requests timeouts don't derive from TimeoutError
+        status = getattr(error, "code", None)
+        if not isinstance(status, int):
+            status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and status in TRANSIENT_STATUS:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies (seconds)."""
+
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p):
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+# Process-wide limits shared by every ask()
+_in_flight = threading.BoundedSemaphore(GENERATION_MAX_IN_FLIGHT)
+_executor = ThreadPoolExecutor(max_workers=GENERATION_MAX_IN_FLIGHT, thread_name_prefix="llm")
+latencies = LatencyTracker()
+
+
+def _call(chain, inputs):
+    # The slot is held for as long as the request really runs, even after its caller gave up
+    start = time.perf_counter()
+    try:
+        result = chain.invoke(inputs)
+        latencies.record(time.perf_counter() - start)
+        return result
+    finally:
+        _in_flight.release()
+
+
+def invoke_with_budget(chain, inputs, budget_s, hedge=GENERATION_HEDGE,
+                       hedge_percentile=GENERATION_HEDGE_PERCENTILE,
+                       hedge_min_samples=GENERATION_HEDGE_MIN_SAMPLES):
+    """
+    Invoke the chain within budget_s seconds, optionally hedging slow requests.
+
+    A hedge (second identical request) is sent once the first has run longer than the
+    hedge_percentile of recent latencies, or straight away if the first one fails with a
+    transient error, as long as an in-flight slot is free. At most two requests are made;
+    the first successful response wins.
+
+    Raises:
+        BudgetExceeded: if no response (or no in-flight slot) was obtained in time
+        Exception: the first non-transient error as is, or the last transient one when
+            every attempt failed
+    """
+    deadline = time.monotonic() + budget_s
+    if not _in_flight.acquire(timeout=budget_s):
+        raise BudgetExceeded("No free generation slot within the latency budget")
+    pending = {_executor.submit(_call, chain, inputs)}
+
+    hedge_at = None
+    if hedge and len(latencies) >= hedge_min_samples:
+        hedge_at = time.monotonic() + latencies.percentile(hedge_percentile)
+
+    attempts = 1
+    error = None
+    while pending:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        timeout = deadline - now
+        if hedge_at is not None:
+            timeout = min(timeout, max(hedge_at - now, 0))
+
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+            if not is_transient(error):
+                raise error
+            logger.warning(f"LLM request failed: {error}")
+
+        slow = hedge_at is not None and time.monotonic() >= hedge_at
+        if (slow or (error is not None and not pending)) and attempts < 2:
+            hedge_at = None
+            if _in_flight.acquire(blocking=False):
+                logger.info("LLM response slow or failed, sending a hedged request")
+                pending.add(_executor.submit(_call, chain, inputs))
+                attempts += 1
+
+    if error is not None and not pending:
+        raise error
+    raise BudgetExceeded(f"No LLM response within {budget_s:.1f}s")
+
+
+def generate_within_budget(chain, inputs, context, question, budget_s):
+    """
+    Invoke the chain within budget_s, degrading to an extractive answer from context
+    (the document chunks only) when the budget runs out or every attempt fails with a
+    transient error. Other errors are raised, so a misconfiguration isn't hidden.
+    """
+    try:
+        return invoke_with_budget(chain, inputs, budget_s)
+    except BudgetExceeded as e:
+        logger.warning(f"{e}, falling back to an extractive answer")
+        notice = FALLBACK_NOTICE
+    except Exception as e:
+        if not is_transient(e):
+            raise
+        logger.warning(f"LLM unavailable ({e}), falling back to an extractive answer")
+        notice = UNAVAILABLE_NOTICE
+    return extractive_answer(context, question, notice=notice)
+
+
+def extractive_answer(context, question, max_sentences=FALLBACK_SENTENCES, notice=FALLBACK_NOTICE):
+    """
+    Build an answer from the context alone: the sentences sharing the most terms with the
+    question, kept in context order (which follows the rerank order of the chunks).
+    """
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", context) if len(s.strip()) >= 20]
+    if not sentences:
+        return "I couldn't generate an answer right now. Please try again."
+
+    terms = content_terms(question)
+    scored = [
+        (len(terms & content_terms(s)), i)
+        for i, s in enumerate(sentences)
+    ]
+    best = sorted(scored, key=lambda x: (-x[0], x[1]))[:max_sentences]
+    picked = sorted(i for _, i in best)
+    return notice + "\n\n" + "\n".join(f"- {sentences[i]}" for i in picked)
@@ -0,0 +1,332 @@
+# src/retriever/generations.py
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from src.config import INDEX_CHECK_INTERVAL_S
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Layout under the store root (PERSIST_DIR):
+#   gen-<timestamp>-<id>/   one complete Chroma store per ingest
+#   CURRENT                 name of the published generation
+#   leases/<gen>.<pid>      held by every process reading or building a generation
+#   ingest.lock             OS file lock held by the one ingest allowed to build and publish at a time
+#   gc.lock                 OS file lock making lease taking and generation deletion mutually exclusive
+POINTER_FILE = "CURRENT"
+LEASE_DIR = "leases"
+INGEST_LOCK = "ingest.lock"
+GC_LOCK = "gc.lock"
+GEN_PREFIX = "gen-"
+LEGACY = "."  # a store ingested before generations existed, living directly in the root
+
+
+def current_generation(root):
+    """Name of the published generation, LEGACY for a pre-generation store, or None."""
+    try:
+        with open(os.path.join(root, POINTER_FILE), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+        return name or None
+    except FileNotFoundError:
+        if os.path.exists(os.path.join(root, "chroma.sqlite3")):
+            return LEGACY
+        return None
+
+
+def current_path(root):
+    """Directory of the published generation (None when nothing has been ingested)."""
+    name = current_generation(root)
+    return None if name is None else os.path.normpath(os.path.join(root, name))
+
+
+def _try_lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _file_lock(path, poll=0.05, wait_message=None):
+    """
+    Cross-process exclusive lock on path (flock / msvcrt.locking). The OS releases it when
+    the holder exits, even by crashing, so there are no stale locks to break. The file is
+    never removed, so every process always locks the same one.
+    """
+    with open(path, "a+") as f:
+        while True:
+            try:
+                _try_lock(f)
+                break
+            except OSError:
+                if wait_message:
+                    logger.info(wait_message)
+                    wait_message = None
+                time.sleep(poll)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+@contextmanager
+def ingest_lock(root):
+    """Serialize ingests, so each one builds on the generation the previous one published."""
+    os.makedirs(root, exist_ok=True)
+    with _file_lock(os.path.join(root, INGEST_LOCK), poll=1.0,
+                    wait_message="Another ingest is running, waiting for it to publish..."):
+        yield
+
+
+def new_generation(root, copy_current=False):
+    """
+    Create the directory for a new, unpublished generation, leased to this process.
+
+    The generation starts empty, or with copy_current as a copy of the published store
+    (for an additive ingest). Call it under ingest_lock() and drop_lease() once the
+    generation is published or abandoned.
+    """
+    name = f"{GEN_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    path = os.path.join(root, name)
+    take_lease(root, name)  # before the directory exists, so no GC can ever see it unleased
+    source = current_path(root) if copy_current else None
+    if source:
+        # A legacy store lives in the root itself, so skip the generation bookkeeping
+        ignore = shutil.ignore_patterns(f"{GEN_PREFIX}*", POINTER_FILE, f"{POINTER_FILE}.*", LEASE_DIR)
+        shutil.copytree(source, path, ignore=ignore)
+    else:
+        os.makedirs(path)
+    return name, path
+
+
+def publish(root, name):
+    """Atomically point CURRENT at the given generation."""
+    tmp = os.path.join(root, f"{POINTER_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, POINTER_FILE))
+    logger.info(f"Published index generation {name}")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lease_path(root, name):
+    return os.path.join(root, LEASE_DIR, f"{name}.{os.getpid()}")
+
+
+def take_lease(root, name):
+    os.makedirs(os.path.join(root, LEASE_DIR), exist_ok=True)
+    with _file_lock(os.path.join(root, GC_LOCK)):
+        open(_lease_path(root, name), "w").close()
+
+
+def lease_current(root):
+    """
+    Lease the published generation and return (name, path), or (None, None) if there is
+    none. The lease is taken under the GC lock and re-checked, so the returned directory
+    cannot be deleted until drop_lease(root, name).
+    """
+    os.makedirs(os.path.join(root, LEASE_DIR), exist_ok=True)
+    while True:
+        name = current_generation(root)
+        if name is None:
+            return None, None
+        path = os.path.normpath(os.path.join(root, name))
+        with _file_lock(os.path.join(root, GC_LOCK)):
+            if os.path.isdir(path):
+                open(_lease_path(root, name), "w").close()
+                return name, path
+        # Published and collected between the two reads, try the newer one
+
+
+@contextmanager
+def reading_current(root):
+    """Yield the path of the published generation (None if nothing is published), leased meanwhile."""
+    name, path = lease_current(root)
+    try:
+        yield path
+    finally:
+        if name is not None:
+            drop_lease(root, name)
+
+
+def drop_lease(root, name):
+    try:
+        os.remove(_lease_path(root, name))
+    except FileNotFoundError:
+        pass
+
+
+def leased_generations(root):
+    """Generations held by a live process (leases of dead processes are cleaned up)."""
+    leased = set()
+    lease_dir = os.path.join(root, LEASE_DIR)
+    if not os.path.isdir(lease_dir):
+        return leased
+    for entry in os.listdir(lease_dir):
+        name, _, pid = entry.rpartition(".")
+        if pid.isdigit() and _pid_alive(int(pid)):
+            leased.add(name)
+        else:
+            try:
+                os.remove(os.path.join(lease_dir, entry))
+            except OSError:
+                pass
+    return leased
+
+
+def collect_garbage(root, keep=()):
+    """Delete generations that are neither published, leased nor listed in keep."""
+    if not os.path.isdir(root):
+        return []
+    removed = []
+    with _file_lock(os.path.join(root, GC_LOCK)):
+        protected = {current_generation(root), *leased_generations(root), *keep}
+        for entry in os.listdir(root):
+            if entry.startswith(GEN_PREFIX) and entry not in protected:
+                # Open files can block deletion on Windows; whatever remains is retried next time
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+                if not os.path.exists(os.path.join(root, entry)):
+                    removed.append(entry)
+    if removed:
+        logger.info(f"Removed old index generations: {', '.join(removed)}")
+    return removed
+
+
+class IndexManager:
+    """
+    Serve the published index generation and hot-swap to newer ones between requests.
+
+    reader() hands out the current store and counts it as in use. When a new generation
+    is published it is opened on a background thread while the old one keeps serving;
+    new requests switch once it is ready, and the old store is released and garbage
+    collected after its last in-flight reader finishes.
+    """
+
+    def __init__(self, root, open_fn, close_fn=None, check_interval=INDEX_CHECK_INTERVAL_S):
+        self.root = root
+        self.open_fn = open_fn  # path -> vector store
+        self.close_fn = close_fn  # vector store -> None, frees a retired store's client and memory
+        self.check_interval = check_interval
+        self.name = None
+        self.db = None
+        self._refs = {}
+        self._stores = {}
+        self._lock = threading.Lock()
+        self._first_open_lock = threading.Lock()
+        self._loading = None
+        self._last_check = 0.0
+
+    def _open(self, name):
+        path = os.path.normpath(os.path.join(self.root, name))
+        take_lease(self.root, name)
+        try:
+            if not os.path.isdir(path):
+                # Never let Chroma create an empty store in place of a collected generation
+                raise FileNotFoundError(f"Index generation {name} no longer exists")
+            return self.open_fn(path)
+        except Exception:
+            drop_lease(self.root, name)
+            raise
+
+    def _swap_in(self, name, db):
+        with self._lock:
+            old = self.name
+            self.name, self.db = name, db
+            self._stores[name] = db
+            self._refs.setdefault(name, 0)
+            self._loading = None
+        logger.info(f"Serving index generation {name}")
+        if old is not None:
+            self._retire(old)
+
+    def _load_in_background(self, name):
+        try:
+            self._swap_in(name, self._open(name))
+        except Exception as e:
+            logger.error(f"Failed to open index generation {name}: {e}")
+            with self._lock:
+                self._loading = None
+
+    def refresh(self, force=False):
+        """Check the pointer and start switching if a newer generation was published."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        latest = current_generation(self.root)
+        if latest is None:
+            return
+        if self.name is None:
+            # Nothing to keep serving meanwhile, so the first open is synchronous
+            with self._first_open_lock:
+                if self.name is None:
+                    self._swap_in(latest, self._open(latest))
+            return
+        with self._lock:
+            if latest == self.name or self._loading == latest:
+                return
+            self._loading = latest
+        threading.Thread(target=self._load_in_background, args=(latest,), name="index-swap", daemon=True).start()
+
+    @contextmanager
+    def reader(self):
+        """Yield the current vector store, pinned for the duration of the block."""
+        self.refresh(force=self.name is None)
+        with self._lock:
+            if self.name is None:
+                raise FileNotFoundError(f"No index published in {self.root}, run: python main.py ingest --path ./data")
+            name, db = self.name, self.db
+            self._refs[name] += 1
+        try:
+            yield db
+        finally:
+            with self._lock:
+                self._refs[name] -= 1
+            self._retire(name)
+
+    def _retire(self, name):
+        """Release a generation that is no longer current once nobody is reading it."""
+        with self._lock:
+            if name == self.name or self._refs.get(name, 0) > 0 or name not in self._stores:
+                return
+            db = self._stores.pop(name)
+            del self._refs[name]
+            keep = list(self._stores)
+        if self.close_fn is not None:
+            try:
+                self.close_fn(db)
+            except Exception as e:
+                logger.warning(f"Could not close index generation {name}: {e}")
+        drop_lease(self.root, name)
+        collect_garbage(self.root, keep=keep)
@@ -0,0 +1,147 @@
+# src/retriever/tuning.py
+import itertools
+import json
+import logging
+import time
+
+import numpy as np
+
+from src.ingestion.store_chroma import hnsw_metadata, set_search_ef
+
+logger = logging.getLogger(__name__)
+
+# Sweep grid: index construction, search and candidate depth
+M_GRID = (8, 16, 32)
+CONSTRUCTION_EF_GRID = (64, 128, 200)
+SEARCH_EF_GRID = (16, 32, 64, 128)
+K_GRID = (5, 8, 10, 15, 20)
+
+
+def exact_neighbours(query_vecs, doc_vecs, k):
+    """Brute-force top-k by squared L2 distance (Chroma's default space)."""
+    dists = (
+        np.sum(query_vecs ** 2, axis=1, keepdims=True)
+        - 2 * query_vecs @ doc_vecs.T
+        + np.sum(doc_vecs ** 2, axis=1)
+    )
+    return np.argsort(dists, axis=1)[:, :k]
+
+
+class RerankScorer:
+    """Cross-encoder scores cached per (query, chunk) pair, with the measured cost per pair."""
+
+    def __init__(self, reranker, queries, texts):
+        self.reranker = reranker
+        self.queries = queries
+        self.texts = texts
+        self.scores = {}
+        self.pairs_scored = 0
+        self.seconds = 0.0
+
+    def score(self, qi, ids):
+        missing = [i for i in ids if (qi, i) not in self.scores]
+        if missing:
+            start = time.perf_counter()
+            values = self.reranker.predict([[self.queries[qi], self.texts[i]] for i in missing])
+            self.seconds += time.perf_counter() - start
+            self.pairs_scored += len(missing)
+            for i, value in zip(missing, values):
+                self.scores[(qi, i)] = float(value)
+        return [self.scores[(qi, i)] for i in ids]
+
+    def top(self, qi, ids, k):
+        ids = [int(i) for i in ids]
+        ranked = sorted(zip(ids, self.score(qi, ids)), key=lambda x: x[1], reverse=True)
+        return [i for i, _ in ranked[:k]]
+
+    @property
+    def pair_ms(self):
+        return self.seconds * 1000 / max(self.pairs_scored, 1)
+
+
+def ann_search(collection, query_vecs, k):
+    """Run the queries through an HNSW collection, returning chunk indices and mean latency (ms)."""
+    results = []
+    start = time.perf_counter()
+    for vec in query_vecs:
+        res = collection.query(query_embeddings=[vec.tolist()], n_results=k, include=[])
+        results.append([int(i) for i in res["ids"][0]])
+    latency_ms = (time.perf_counter() - start) * 1000 / len(query_vecs)
+    return results, latency_ms
+
+
+def sweep(doc_vecs, query_vecs, scorer, reference_k, final_top_k):
+    """
+    Evaluate every grid point against the exact pipeline.
+
+    Recall is the overlap between the final reranked chunks of the ANN pipeline and
+    those obtained by reranking the exact top reference_k neighbours.
+
+    Returns:
+        List of dicts with the parameters, recall and estimated per-query cost (ms)
+    """
+    import chromadb
+
+    exact = exact_neighbours(query_vecs, doc_vecs, reference_k)
+    reference = [set(scorer.top(qi, ids, final_top_k)) for qi, ids in enumerate(exact)]
+
+    client = chromadb.EphemeralClient()
+    ids = [str(i) for i in range(len(doc_vecs))]
+    batch = 5000
+    rows = []
+    for m, construction_ef in itertools.product(M_GRID, CONSTRUCTION_EF_GRID):
+        # search_ef is query-time only, so one build per (M, construction_ef) serves every value
+        name = f"tune_{m}_{construction_ef}"
+        collection = client.create_collection(name, metadata=hnsw_metadata(m, construction_ef, SEARCH_EF_GRID[0]))
+        for start in range(0, len(ids), batch):
+            collection.add(ids=ids[start:start + batch], embeddings=doc_vecs[start:start + batch].tolist())
+
+        for search_ef in SEARCH_EF_GRID:
+            set_search_ef(collection, search_ef, strict=True)
+            for k in K_GRID:
+                if k < final_top_k:
+                    continue
+                ann, latency_ms = ann_search(collection, query_vecs, k)
+                hits = [
+                    len(reference[qi] & set(scorer.top(qi, found, final_top_k)))
+                    for qi, found in enumerate(ann)
+                ]
+                rows.append({
+                    "hnsw_m": m,
+                    "hnsw_construction_ef": construction_ef,
+                    "hnsw_search_ef": search_ef,
+                    "initial_retrieval_k": k,
+                    "recall": sum(hits) / (final_top_k * len(ann)),
+                    "ann_ms": latency_ms,
+                })
+            logger.info(f"Swept M={m} construction_ef={construction_ef} search_ef={search_ef}")
+        client.delete_collection(name)
+
+    for row in rows:
+        row["cost_ms"] = row["ann_ms"] + row["initial_retrieval_k"] * scorer.pair_ms
+    return rows
+
+
+def pick_config(rows, target_recall):
+    """Cheapest configuration meeting the recall target (best recall if none does)."""
+    meeting = [r for r in rows if r["recall"] >= target_recall]
+    if not meeting:
+        logger.warning(f"No configuration reaches recall {target_recall}, using the most accurate one")
+        return max(rows, key=lambda r: (r["recall"], -r["cost_ms"]))
+    # Ties on cost go to the smaller graph, which is cheaper to build and hold in memory
+    return min(meeting, key=lambda r: (round(r["cost_ms"], 2), r["hnsw_m"], r["hnsw_construction_ef"]))
+
+
+def write_config(best, path, target_recall):
+    config = {
+        "hnsw_m": best["hnsw_m"],
+        "hnsw_construction_ef": best["hnsw_construction_ef"],
+        "hnsw_search_ef": best["hnsw_search_ef"],
+        "initial_retrieval_k": best["initial_retrieval_k"],
+        "target_recall": target_recall,
+        "recall": round(best["recall"], 4),
+        "cost_ms": round(best["cost_ms"], 3),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    return config
@@ -4,3 +4,22 @@ def ensure_dir(path):
     p = Path(path)
     p.mkdir(parents=True, exist_ok=True)
     return p
+
+def sample_queries(chunks, n=50, seed=0, max_words=12):
+    """Draw pseudo-queries from the corpus: the opening words of randomly sampled chunks."""
+    import random
+    candidates = [c for c in chunks if len(c.page_content.split()) >= 4]
+    picked = random.Random(seed).sample(candidates, min(n, len(candidates)))
+    return [" ".join(c.page_content.split()[:max_words]) for c in picked]
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "of", "for", "to", "in", "on", "at", "and", "or",
+    "what", "which", "who", "how", "when", "where", "do", "does", "did", "i", "me", "my", "can",
+    "about", "tell", "please", "with", "by", "be", "it", "this", "that", "there", "any", "also",
+    "those", "these", "they", "them", "its", "their", "else", "same", "regarding",
+}
+
+def content_terms(text):
+    """Lower-cased words of text minus stopwords and pronouns."""
+    import re
+    return set(re.findall(r"\w+", text.lower())) - STOPWORDS
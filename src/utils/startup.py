@@ -0,0 +1,261 @@
+# src/utils/startup.py
+import importlib
+import logging
+import os
+import threading
+import time
+
+from src.config import (
+    PERSIST_DIR,
+    EMBEDDING_MODEL,
+    RERANKER_MODEL,
+    LLM_MODEL,
+    GOOGLE_API_KEY_ENV
+)
+
+logger = logging.getLogger(__name__)
+
+# Heavy third-party modules, imported in this order so each timing is what that module adds
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_core",
+    "langchain_huggingface",
+    "chromadb",
+    "langchain_chroma",
+    "langchain_google_genai",
+)
+
+
+def load_embeddings():
+    from src.embeddings.hugging_face import get_embeddings
+    embeddings = get_embeddings(EMBEDDING_MODEL)
+    embeddings.embed_query("warmup")  # first call pays tokenizer / kernel initialisation
+    return embeddings
+
+
+def load_reranker():
+    from src.embeddings.reranker import get_reranker
+    reranker = get_reranker(RERANKER_MODEL)
+    reranker.predict([["warmup", "warmup"]])
+    return reranker
+
+
+def open_vector_db(path, embeddings):
+    from langchain_chroma import Chroma
+    db = Chroma(
+        persist_directory=path,
+        embedding_function=embeddings,
+        collection_name="langchain"
+    )
+    db.similarity_search_by_vector(embeddings.embed_query("warmup"), k=1)  # loads the HNSW index
+    return db
+
+
+def close_vector_db(db):
+    """
+    Stop a retired store's Chroma system and evict it from chromadb's per-path client cache,
+    which would otherwise keep its sqlite handle and HNSW index in memory for good.
+    """
+    client = getattr(db, "_client", None)
+    if client is None:
+        return
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+    except ImportError:
+        from chromadb.api.client import SharedSystemClient  # chromadb < 0.6
+    identifier = getattr(client, "_identifier", None)
+    system = SharedSystemClient._identifier_to_system.pop(identifier, None) or getattr(client, "_system", None)
+    if system is not None:
+        system.stop()
+
+
+def load_vector_db(embeddings):
+    """IndexManager over the versioned store, with the published generation opened and warm."""
+    from src.retriever.generations import IndexManager
+    index = IndexManager(PERSIST_DIR, lambda path: open_vector_db(path, embeddings), close_fn=close_vector_db)
+    index.refresh(force=True)
+    return index
+
+
+def load_chain():
+    from src.rag.chain import build_chain
+    api_key = os.getenv(GOOGLE_API_KEY_ENV)
+    if not api_key:
+        raise ValueError(f"{GOOGLE_API_KEY_ENV} not found in environment")
+    return build_chain(LLM_MODEL, api_key)
+
+
+# Background retry backoff for failed loads
+RETRY_INITIAL_S = 5
+RETRY_MAX_S = 60
+
+
+class Prewarmer:
+    """
+    Import heavy modules and load/warm every model on a background thread.
+
+    Consumers call get(name), which blocks only until that resource is ready.
+    Failed loads are retried on the next get() and, with backoff, in the background.
+    Every import and load is timed so the startup cost can be broken down.
+    """
+
+    def __init__(self, modules=HEAVY_MODULES):
+        self.modules = modules
+        self.loaders = [
+            ("embeddings", load_embeddings),
+            ("reranker", load_reranker),
+            ("vector_db", lambda: load_vector_db(self.get("embeddings"))),
+            ("chain", load_chain),
+        ]
+        self.timings = []  # (kind, name, seconds)
+        self._timings_lock = threading.Lock()
+        self.resources = {}
+        self.errors = {}
+        self.total_seconds = None
+        self._events = {name: threading.Event() for name, _ in self.loaders}
+        self._retry_locks = {name: threading.Lock() for name, _ in self.loaders}
+        self._thread = None
+
+    def start(self):
+        """Start warming in a daemon thread that then keeps retrying failed loads (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_and_retry, name="prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run_and_retry(self):
+        self.run()
+        # Keep retrying failed loads in the background so an idle replica still becomes ready
+        delay = RETRY_INITIAL_S
+        while self.errors:
+            time.sleep(delay)
+            for name in list(self.errors):
+                self._retry(name)
+            delay = min(delay * 2, RETRY_MAX_S)
+
+    def run(self):
+        """Import and load everything once, in the calling thread; failures are left in errors."""
+        start = time.perf_counter()
+        for module in self.modules:
+            t0 = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                logger.warning(f"Prewarm: could not import {module}: {e}")
+            self._record(("import", module, time.perf_counter() - t0))
+
+        for name, _ in self.loaders:
+            self._load(name)
+        self.total_seconds = time.perf_counter() - start
+        logger.info("Prewarm complete\n" + self.report())
+
+    def _retry(self, name):
+        with self._retry_locks[name]:
+            # Another caller may have retried successfully while this one waited
+            if name in self.errors:
+                logger.info(f"Retrying {name} after: {self.errors[name]}")
+                self._load(name, kind="retry")
+
+    def _load(self, name, kind="load"):
+        loader = dict(self.loaders)[name]
+        t0 = time.perf_counter()
+        try:
+            self.resources[name] = loader()
+            self.errors.pop(name, None)
+        except Exception as e:
+            self.errors[name] = e
+            logger.error(f"Prewarm: failed to load {name}: {e}")
+        finally:
+            self._record((kind, name, time.perf_counter() - t0))
+            self._events[name].set()
+
+    def _record(self, entry):
+        with self._timings_lock:
+            if entry[0] == "retry":
+                # Only the latest retry per resource is kept, so a failing replica's report stays bounded
+                self.timings = [t for t in self.timings if t[:2] != entry[:2]] + [entry]
+            else:
+                self.timings.append(entry)
+
+    def get(self, name, timeout=None):
+        """
+        Block until the named resource is loaded. A resource whose load failed is retried
+        (once per call), so transient errors such as a network hiccup don't need a restart.
+        """
+        if not self._events[name].wait(timeout):
+            raise TimeoutError(f"{name} is still loading")
+        if name in self.errors:
+            self._retry(name)
+        if name in self.errors:
+            raise self.errors[name]
+        return self.resources[name]
+
+    def status(self):
+        """Map each resource to 'ready', 'loading' or 'failed'."""
+        return {
+            name: "failed" if name in self.errors else "ready" if self._events[name].is_set() else "loading"
+            for name, _ in self.loaders
+        }
+
+    @property
+    def ready(self):
+        return all(state == "ready" for state in self.status().values())
+
+    def report(self):
+        """Human-readable import / load time breakdown."""
+        lines = [f"{kind:<6} {name:<24} {seconds * 1000:9.1f} ms" for kind, name, seconds in self.timings]
+        if self.total_seconds is not None:
+            lines.append(f"{'total':<31} {self.total_seconds * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+
+_prewarmer = None
+_prewarmer_lock = threading.Lock()
+
+
+def get_prewarmer():
+    """Process-wide Prewarmer, started on first use (serve.py starts it before the server)."""
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            _prewarmer = Prewarmer().start()
+    return _prewarmer
+
+
+def serve_readiness(port):
+    """
+    Expose GET /ready on a side port: 200 once every resource is loaded, 503 before that
+    (or after a failure), with the status and timing breakdown as JSON. Needs no session.
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class ReadinessHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/ready":
+                self.send_error(404)
+                return
+            prewarmer = get_prewarmer()
+            body = json.dumps({
+                "ready": prewarmer.ready,
+                "status": prewarmer.status(),
+                "timings_ms": [
+                    {"kind": kind, "name": name, "ms": round(seconds * 1000, 1)}
+                    for kind, name, seconds in list(prewarmer.timings)
+                ],
+            }).encode("utf-8")
+            self.send_response(200 if prewarmer.ready else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep probe traffic out of the app log
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), ReadinessHandler)
+    threading.Thread(target=server.serve_forever, name="readiness", daemon=True).start()
+    logger.info(f"Readiness endpoint on http://0.0.0.0:{port}/ready")
+    return server
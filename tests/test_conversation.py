@@ -0,0 +1,95 @@
+import zlib
+
+import numpy as np
+
+from src.rag.conversation import ConversationState
+from src.utils.helpers import content_terms
+
+
+class StubEmbeddings:
+    """Bag-of-words stand-in for the embedding model: same content terms, same vector."""
+
+    def embed_query(self, text):
+        vec = np.zeros(256)
+        for term in content_terms(text):
+            vec[zlib.crc32(term.encode()) % len(vec)] += 1
+        return vec.tolist()
+
+
+class StubSearch:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, query, query_vec):
+        self.queries.append(query)
+        return [f"chunk for {query}"]
+
+
+TOPIC = "What is the fee structure for BCom?"
+
+
+def started(question=TOPIC):
+    state = ConversationState()
+    search = StubSearch()
+    state.retrieve(question, StubEmbeddings(), search)
+    return state, search
+
+
+def test_first_question_is_not_condensed():
+    state = ConversationState()
+    assert state.condense(TOPIC) == TOPIC
+
+
+def test_followup_is_condensed_with_topic():
+    state, _ = started()
+    assert state.condense("And the fees for that?") == f"And the fees for that (regarding: {TOPIC})"
+    assert state.condense("What about it?") == f"What about it (regarding: {TOPIC})"
+
+
+def test_new_questions_are_not_condensed():
+    state, _ = started()
+    for question in (
+        "Is there a hostel?",
+        "What is this university's address?",
+        "Tell me about the admission process for MSc Physics and what documents it needs",
+    ):
+        assert state.condense(question) == question
+
+
+def test_followup_without_new_terms_reuses_chunks():
+    state, search = started()
+    standalone, docs, reused = state.retrieve("What about it?", StubEmbeddings(), search)
+    assert reused
+    assert docs == [f"chunk for {TOPIC}"]
+    assert len(search.queries) == 1
+
+
+def test_followup_with_new_terms_retrieves_again():
+    state, search = started()
+    standalone, docs, reused = state.retrieve("And the hostel fees for that?", StubEmbeddings(), search)
+    assert not reused
+    assert search.queries == [TOPIC, standalone]
+    assert "hostel" in standalone
+
+
+def test_new_question_replaces_topic():
+    state, search = started()
+    state.retrieve("Is there a hostel?", StubEmbeddings(), search)
+    assert state.topic == "Is there a hostel?"
+    assert search.queries == [TOPIC, "Is there a hostel?"]
+
+
+def test_summary_stays_within_bound():
+    state = ConversationState(max_summary_chars=300, answer_chars=80)
+    for i in range(20):
+        state.update(f"question {i} " + "word " * 50, f"answer {i} " + "text " * 100)
+        assert len(state.summary) <= 300
+    # The newest turn is kept, the oldest ones are dropped
+    assert "question 19" in state.summary
+    assert "question 0 " not in state.summary
+
+
+def test_single_turn_longer_than_bound_is_clipped():
+    state = ConversationState(max_summary_chars=50, answer_chars=200)
+    state.update("q " * 100, "a " * 100)
+    assert 0 < len(state.summary) <= 50
@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.retriever import generations as g
+
+
+def build(root, text, copy_current=True):
+    """Build and publish a generation the way main.py ingest does."""
+    with g.ingest_lock(root):
+        name, path = g.new_generation(root, copy_current=copy_current)
+        try:
+            with open(os.path.join(path, "chroma.sqlite3"), "a") as f:
+                f.write(text)
+            g.publish(root, name)
+        finally:
+            g.drop_lease(root, name)
+    g.collect_garbage(root)
+    return name
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "chroma_db")
+
+
+def test_generation_being_built_survives_garbage_collection(root):
+    build(root, "a")
+    name, path = g.new_generation(root)
+    # Another ingest or the app collecting garbage while this one is still building
+    g.collect_garbage(root)
+    assert os.path.isdir(path)
+    g.drop_lease(root, name)
+    g.collect_garbage(root)
+    assert not os.path.exists(path)
+
+
+def test_concurrent_ingests_keep_each_others_content(root):
+    build(root, "a")
+    threads = [threading.Thread(target=build, args=(root, text)) for text in "bc"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(os.path.join(g.current_path(root), "chroma.sqlite3")) as f:
+        assert sorted(f.read()) == ["a", "b", "c"]
+    assert [e for e in os.listdir(root) if e.startswith(g.GEN_PREFIX)] == [g.current_generation(root)]
+
+
+def test_reader_lease_protects_a_replaced_generation(root):
+    first = build(root, "a")
+    with g.reading_current(root) as path:
+        build(root, "b", copy_current=False)
+        assert g.current_generation(root) != first
+        assert os.path.isdir(path)
+    g.collect_garbage(root)
+    assert not os.path.exists(path)
+
+
+def test_index_manager_swaps_and_closes_retired_store(root):
+    build(root, "a")
+    closed = []
+    index = g.IndexManager(root, open_fn=lambda p: open(os.path.join(p, "chroma.sqlite3")).read(),
+                           close_fn=closed.append, check_interval=0)
+    with index.reader() as db:
+        assert db == "a"
+        old_path = g.current_path(root)
+        build(root, "b", copy_current=False)
+        index.refresh()
+        for t in threading.enumerate():
+            if t.name == "index-swap":
+                t.join()
+        with index.reader() as new_db:
+            assert new_db == "b"
+        # The in-flight reader still holds the old generation
+        assert os.path.isdir(old_path) and closed == []
+    assert closed == ["a"]
+    assert not os.path.exists(old_path)
+
+
+def test_lock_of_a_killed_holder_is_released(root):
+    os.makedirs(root)
+    lock = os.path.join(root, g.INGEST_LOCK)
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import time; from src.retriever.generations import _file_lock\n"
+         f"with _file_lock({lock!r}):\n    print('locked', flush=True); time.sleep(60)"],
+        stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        acquired = threading.Event()
+
+        def take():
+            with g._file_lock(lock):
+                acquired.set()
+
+        waiter = threading.Thread(target=take, daemon=True)
+        waiter.start()
+        assert not acquired.wait(0.3)
+        holder.kill()
+        assert acquired.wait(5)
+    finally:
+        holder.kill()
+        holder.wait()
+
+
+def test_lock_is_exclusive_across_waiters(root):
+    os.makedirs(root)
+    lock = os.path.join(root, g.GC_LOCK)
+    inside, overlaps = [0], []
+
+    def hold():
+        for _ in range(20):
+            with g._file_lock(lock, poll=0.001):
+                inside[0] += 1
+                overlaps.append(inside[0] > 1)
+                inside[0] -= 1
+
+    threads = [threading.Thread(target=hold) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(overlaps) == 80 and not any(overlaps)
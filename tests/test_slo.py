@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from src.rag import slo
+
+
+class StubLLM:
+    """Local stand-in for the Gemini chain: anything with .invoke() works with ask()."""
+
+    def __init__(self, delays=(), errors=(), answer="llm answer"):
+        self.delays = list(delays)
+        self.errors = list(errors)
+        self.answer = answer
+        self.calls = 0
+        self.release = threading.Event()  # ends any call still sleeping when the test finishes
+
+    def invoke(self, inputs):
+        i = self.calls
+        self.calls += 1
+        if i < len(self.delays):
+            self.release.wait(self.delays[i])
+        if i < len(self.errors) and self.errors[i] is not None:
+            raise self.errors[i]
+        return self.answer
+
+
+class StubAPIError(Exception):
+    """Error carrying an HTTP status the way the Google API exceptions do."""
+
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+CONTEXT = (
+    "Payment through the University cash counter is not accepted. "
+    "Only online payment using Net Banking, Debit Card or Credit Card is accepted."
+)
+QUESTION = "Is payment through the cash counter accepted?"
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    slo.latencies.samples.clear()
+    stubs = []
+    yield stubs
+    for stub in stubs:
+        stub.release.set()
+    # Let released calls give their in-flight slots back before the next test
+    deadline = time.monotonic() + 2
+    while slo._in_flight._value < slo.GENERATION_MAX_IN_FLIGHT and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_fast_response_is_returned(clean_state):
+    llm = StubLLM()
+    result = slo.generate_within_budget(llm, {}, CONTEXT, QUESTION, budget_s=1)
+    assert result == "llm answer"
+    assert llm.calls == 1
+
+
+def test_timeout_falls_back_to_extractive_answer(clean_state):
+    llm = StubLLM(delays=[5, 5])
+    clean_state.append(llm)
+    start = time.monotonic()
+    result = slo.generate_within_budget(llm, {}, CONTEXT, QUESTION, budget_s=0.2)
+    assert time.monotonic() - start < 1
+    assert result.startswith(slo.FALLBACK_NOTICE)
+    assert "cash counter is not accepted" in result
+
+
+def test_hedge_after_transient_failure_returns_second_attempt(clean_state):
+    llm = StubLLM(errors=[StubAPIError(503)], answer="hedged answer")
+    assert slo.generate_within_budget(llm, {}, CONTEXT, QUESTION, budget_s=1) == "hedged answer"
+    assert llm.calls == 2
+
+
+def test_hedge_when_first_request_is_slow(clean_state):
+    for _ in range(slo.GENERATION_HEDGE_MIN_SAMPLES):
+        slo.latencies.record(0.01)
+    llm = StubLLM(delays=[5], answer="hedged answer")
+    clean_state.append(llm)
+    assert slo.invoke_with_budget(llm, {}, budget_s=1) == "hedged answer"
+    assert llm.calls == 2
+
+
+def test_both_attempts_failing_falls_back(clean_state):
+    llm = StubLLM(errors=[StubAPIError(429), ConnectionError("reset")])
+    result = slo.generate_within_budget(llm, {}, CONTEXT, QUESTION, budget_s=1)
+    assert result.startswith(slo.UNAVAILABLE_NOTICE)
+    assert "cash counter is not accepted" in result
+    assert llm.calls == 2
+
+
+def test_permanent_error_is_raised_without_hedging(clean_state):
+    llm = StubLLM(errors=[StubAPIError(400)])
+    with pytest.raises(StubAPIError):
+        slo.generate_within_budget(llm, {}, CONTEXT, QUESTION, budget_s=1)
+    assert llm.calls == 1
+
+
+def test_wrapped_transient_error_is_recognised():
+    try:
+        try:
+            raise StubAPIError(503)
+        except StubAPIError as e:
+            raise RuntimeError("Error calling model") from e
+    except RuntimeError as wrapped:
+        assert slo.is_transient(wrapped)
+    assert not slo.is_transient(ValueError("API key not valid"))
+    assert not slo.is_transient(PermissionError("denied"))
+
+
+def test_slot_exhaustion_raises_budget_exceeded(clean_state):
+    blocker = StubLLM(delays=[5] * slo.GENERATION_MAX_IN_FLIGHT)
+    clean_state.append(blocker)
+    threads = [
+        threading.Thread(target=slo.generate_within_budget, args=(blocker, {}, CONTEXT, QUESTION, 0.3))
+        for _ in range(slo.GENERATION_MAX_IN_FLIGHT)
+    ]
+    for t in threads:
+        t.start()
+    while blocker.calls < slo.GENERATION_MAX_IN_FLIGHT:
+        time.sleep(0.01)
+
+    llm = StubLLM()
+    with pytest.raises(slo.BudgetExceeded):
+        slo.invoke_with_budget(llm, {}, budget_s=0.2)
+    assert llm.calls == 0
+    assert slo.generate_within_budget(llm, {}, CONTEXT, QUESTION, budget_s=0.2).startswith(slo.FALLBACK_NOTICE)
+    for t in threads:
+        t.join()
+
+
+def test_ask_fallback_never_quotes_the_conversation_history(clean_state):
+    pytest.importorskip("langchain_google_genai")
+    from src.rag.chain import ask
+
+    history = "Conversation so far:\nUser asked: fees? | Assistant answered: The fee is 500 rupees for payment."
+    llm = StubLLM(delays=[5, 5])
+    clean_state.append(llm)
+    result = ask(llm, CONTEXT, QUESTION, budget_s=0.2, history=history)
+    assert result.startswith(slo.FALLBACK_NOTICE)
+    assert "cash counter is not accepted" in result
+    assert "Conversation so far" not in result
+    assert "500 rupees" not in result
@@ -0,0 +1,38 @@
+import threading
+
+from src.utils import startup
+
+
+def stub_prewarmer(fail=("chain",)):
+    """Prewarmer with instant local loaders; the ones named in fail always raise."""
+    prewarmer = startup.Prewarmer(modules=())
+
+    def loader(name):
+        def load():
+            if name in fail:
+                raise ValueError(f"{name} unavailable")
+            return f"{name} object"
+        return load
+
+    prewarmer.loaders = [(name, loader(name)) for name, _ in prewarmer.loaders]
+    return prewarmer
+
+
+def test_run_returns_after_one_pass_when_a_load_fails():
+    prewarmer = stub_prewarmer()
+    thread = threading.Thread(target=prewarmer.run, daemon=True)
+    thread.start()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert set(prewarmer.errors) == {"chain"}
+    assert prewarmer.status()["embeddings"] == "ready"
+    assert prewarmer.total_seconds is not None
+
+
+def test_retry_timings_stay_bounded():
+    prewarmer = stub_prewarmer()
+    prewarmer.run()
+    for _ in range(50):
+        prewarmer._retry("chain")
+    assert [t[:2] for t in prewarmer.timings].count(("retry", "chain")) == 1
+    assert len(prewarmer.timings) == len(prewarmer.loaders) + 1